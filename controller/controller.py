@@ -1,17 +1,24 @@
 import os
 import json
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QObject, QTimer, Slot, QModelIndex
 from PySide6.QtWidgets import QFileDialog, QMessageBox
 from model.budget import BudgetModel
 from view.main_window import MainWindow
 
-class Controller:
+class Controller(QObject):
     def __init__(self, model: BudgetModel, view: MainWindow):
+        super().__init__(view)
         self.model = model
         self.view = view
         self.was_over_budget = False
         self.group_mapping = {}   # mapping from group label to {member_rows, total_row}
+        self._row_to_group_label = {}  # group total row -> group label
         self.group_collapsed = {} # group label -> bool
+        # Coalesce bursts of edits into one repaint per frame (~60 Hz).
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(16)
+        self._refresh_timer.timeout.connect(self._do_refresh_view)
         self.setup_connections()
         self.refresh_view()
 
@@ -32,45 +39,62 @@ class Controller:
         # New fee signals:
         self.view.feeAmountChanged.connect(self.handle_fee_amount_changed)
         self.view.feePercentageChanged.connect(self.handle_fee_percentage_changed)
-        self.view.table.cellClicked.connect(self.on_table_cell_clicked)
+        self.view.table.clicked.connect(self.on_table_cell_clicked)
 
+    @Slot(int, float)
     def handle_cat_percentage_changed(self, cat_index, new_pct):
         self.model.update_category_percentage(cat_index, new_pct)
         self.refresh_view()
 
+    @Slot(int, float)
     def handle_cat_amount_changed(self, cat_index, new_amt):
         self.model.update_category_amount(cat_index, new_amt)
         self.refresh_view()
 
+    @Slot(float)
     def handle_adminPctChanged(self, new_pct):
         self.model.set_admin_pct(new_pct)
         self.refresh_view()
 
+    @Slot(float)
     def handle_contingencyPctChanged(self, new_pct):
         self.model.set_contingency_pct(new_pct)
         self.refresh_view()
 
+    @Slot(float)
     def handle_grand_total_changed(self, new_total):
         self.model.set_grand_total(new_total)
         self.refresh_view()
 
+    @Slot(int, int)
     def handle_lock_type_changed(self, cat_index, lock_type):
         self.model.update_lock_type(cat_index, lock_type)
         self.refresh_view()
 
+    @Slot()
     def handle_lock_all_amounts(self):
-        self.model.lock_all(1)
+        self.apply_pending()
+        with self.model.batch():
+            self.model.lock_all(1)
         self.refresh_view()
 
+    @Slot()
     def handle_lock_all_percentages(self):
-        self.model.lock_all(2)
+        self.apply_pending()
+        with self.model.batch():
+            self.model.lock_all(2)
         self.refresh_view()
 
+    @Slot()
     def handle_unlock_all(self):
-        self.model.unlock_all()
+        self.apply_pending()
+        with self.model.batch():
+            self.model.unlock_all()
         self.refresh_view()
 
+    @Slot()
     def handle_save_budget(self):
+        self.apply_pending()
         filename, _ = QFileDialog.getSaveFileName(self.view, "Save Budget", "", "JSON Files (*.json)")
         if filename:
             try:
@@ -79,29 +103,38 @@ class Controller:
             except Exception as e:
                 QMessageBox.critical(self.view, "Error", f"Failed to save budget: {str(e)}")
 
+    @Slot()
     def handle_load_budget(self):
+        self.apply_pending()
         filename, _ = QFileDialog.getOpenFileName(self.view, "Load Budget", "", "JSON Files (*.json)")
         if filename:
             try:
-                self.model.load_from_file(filename)
-                QMessageBox.information(self.view, "Load Budget", "Budget loaded successfully!")
+                with self.model.batch():
+                    self.model.load_from_file(filename)
                 self.refresh_view()
+                QMessageBox.information(self.view, "Load Budget", "Budget loaded successfully!")
             except Exception as e:
                 QMessageBox.critical(self.view, "Error", f"Failed to load budget: {str(e)}")
 
+    @Slot()
     def handle_import_excel(self):
+        self.apply_pending()
         filename, _ = QFileDialog.getOpenFileName(self.view, "Import Excel Budget", "", "Excel Files (*.xlsx *.xls)")
         if filename:
             try:
-                self.model.import_from_excel(filename)
-                QMessageBox.information(self.view, "Import Excel", "Budget imported successfully!")
+                with self.model.batch():
+                    self.model.import_from_excel(filename)
                 self.refresh_view()
+                QMessageBox.information(self.view, "Import Excel", "Budget imported successfully!")
             except Exception as e:
                 QMessageBox.critical(self.view, "Error", f"Failed to import Excel budget: {str(e)}")
 
+    @Slot()
     def handle_copy_budget(self):
+        self.apply_pending()
         self.view.copy_data()
 
+    @Slot(int, float)
     def handle_fee_amount_changed(self, fee_index, new_amount):
         fee = self.model.fees[fee_index]
         if fee.fee_type == "fixed":
@@ -109,6 +142,7 @@ class Controller:
             self.model.recalc()
             self.refresh_view()
 
+    @Slot(int, float)
     def handle_fee_percentage_changed(self, fee_index, new_percentage):
         fee = self.model.fees[fee_index]
         if fee.fee_type == "percentage":
@@ -116,45 +150,61 @@ class Controller:
             self.model.recalc()
             self.refresh_view()
 
-    def on_table_cell_clicked(self, row, column):
-        item = self.view.table.item(row, 0)
-        if not item:
+    @Slot(QModelIndex)
+    def on_table_cell_clicked(self, index):
+        group_label = self._row_to_group_label.get(index.row())
+        if not group_label:
             return
-        row_type = item.data(Qt.UserRole)
-        if row_type == "group_total":
-            group_label = item.data(Qt.UserRole + 2)
-            if not group_label:
-                return
-            collapsed = self.group_collapsed.get(group_label, False)
-            new_state = not collapsed
-            self.group_collapsed[group_label] = new_state
-            if group_label in self.group_mapping:
-                member_rows = self.group_mapping[group_label]["member_rows"]
-                for r in member_rows:
-                    self.view.table.setRowHidden(r, new_state)
-                total_row = self.group_mapping[group_label]["total_row"]
-                group_item = self.view.table.item(total_row, 0)
-                if group_item:
-                    text = group_item.text()
-                    if new_state:
-                        if not text.startswith("+ "):
-                            group_item.setText("+ " + text)
-                    else:
-                        if text.startswith("+ "):
-                            group_item.setText(text[2:])
+        collapsed = self.group_collapsed.get(group_label, False)
+        new_state = not collapsed
+        self.group_collapsed[group_label] = new_state
+        member_rows = self.group_mapping[group_label]["member_rows"]
+        self.view.set_rows_hidden((r, new_state) for r in member_rows)
+        self.view.table_model.set_group_collapsed(group_label, new_state)
+
+    def apply_group_collapsed(self):
+        # Row positions can move when the table structure changes, so sync hidden rows to the group state.
+        self.view.set_rows_hidden(
+            (r, self.group_collapsed.get(group_label, False))
+            for group_label, info in self.group_mapping.items()
+            for r in info["member_rows"]
+        )
 
     def refresh_view(self):
+        self._refresh_timer.start()
+
+    def apply_pending(self):
+        # Buttons act on the budget as shown, so apply held cell edits and any queued refresh first.
+        self.view.flush_pending_edits()
+        if self._refresh_timer.isActive():
+            self._refresh_timer.stop()
+            self._do_refresh_view()
+
+    @Slot()
+    def _do_refresh_view(self):
         table_data, group_mapping = self.model.get_table_data()
         self.group_mapping = group_mapping
-        fixed_amt = sum(cat.amount for cat in self.model.categories if cat.lock_type in [1, 2])
-        fixed_pct = sum(cat.percentage for cat in self.model.categories if cat.lock_type in [1, 2])
+        self._row_to_group_label = {info["total_row"]: label for label, info in group_mapping.items()}
+        fixed_amt = self.model.fixed_amt_total
+        fixed_pct = self.model.fixed_pct_total
         remaining_amt = self.model.subtotal - fixed_amt
         remaining_pct = 100 - fixed_pct
         self.view.set_locked_remaining(fixed_amt, fixed_pct, remaining_amt, remaining_pct)
-        self.view.update_table(
-            table_data,
-            over_budget=self.model.over_budget,
-            over_budget_rows=self.model.over_budget_rows
-        )
+        # Keep edit signals from re-entering the handlers while the table is rewritten.
+        was_blocked = self.view.blockSignals(True)
+        try:
+            self.view.update_table(
+                table_data,
+                over_budget=self.model.over_budget,
+                over_budget_rows=self.model.over_budget_rows
+            )
+            self.apply_group_collapsed()
+        finally:
+            self.view.blockSignals(was_blocked)
+        # Notify once per transition into over budget; a modal here would block every edit.
         if remaining_amt < 0:
-            QMessageBox.warning(self.view, "Over Budget", f"Over budget by {abs(remaining_amt):,}.")
\ No newline at end of file
+            if not self.was_over_budget:
+                self.view.statusBar().showMessage(f"Over budget by {abs(remaining_amt):,}.", 5000)
+                self.was_over_budget = True
+        else:
+            self.was_over_budget = False
\ No newline at end of file
@@ -37,6 +37,7 @@ def main():
     model = BudgetModel(grand_total=0)
     model.categories = []
     model.groups = []
+    model.recalc()  # refresh derived group data after replacing the defaults
 
     view = MainWindow()
     controller = Controller(model, view)
@@ -1,13 +1,33 @@
 import json
 import logging
+from contextlib import contextmanager
 from openpyxl import load_workbook
 
+try:
+    import orjson
+except ImportError:  # optional; fall back to the stdlib encoder
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 class OverBudgetError(Exception):
     pass
 
+def _to_number(value):
+    # Numeric cells come back from openpyxl as numbers; only text needs parsing.
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip().replace(" ", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
 class Category:
+    __slots__ = ("name", "percentage", "amount", "amount_override", "lock_type")
+
     def __init__(self, name, percentage):
         self.name = name
         self.percentage = percentage  # In percentage mode, the imported (or computed) percentage.
@@ -33,6 +53,8 @@ class Category:
         return cat
 
 class FeeItem:
+    __slots__ = ("name", "fee_type", "value", "computed_amount")
+
     def __init__(self, name, fee_type, value):
         self.name = name
         self.fee_type = fee_type.lower()  # "percentage" or "fixed"
@@ -50,6 +72,45 @@ class FeeItem:
     def from_dict(cls, data):
         return cls(data["name"], data.get("fee_type", "percentage"), data.get("value", 0.0))
 
+class Row:
+    # One line of the top sheet table, as produced by BudgetModel.get_table_data().
+    __slots__ = ("row_type", "description", "amount", "percentage", "lock_type",
+                 "cat_index", "change", "group_label", "fee_index", "editable")
+
+    def __init__(self, row_type, description="", amount=0, percentage=0, lock_type=0,
+                 cat_index=None, change=None, group_label=None, fee_index=None, editable=False):
+        self.row_type = row_type
+        self.description = description
+        self.amount = amount
+        self.percentage = percentage
+        self.lock_type = lock_type
+        self.cat_index = cat_index
+        self.change = change
+        self.group_label = group_label
+        self.fee_index = fee_index
+        self.editable = editable
+
+    @classmethod
+    def category(cls, cat, cat_index, change):
+        return cls("category", cat.name, cat.amount, cat.percentage,
+                   lock_type=cat.lock_type, cat_index=cat_index, change=change)
+
+    @classmethod
+    def group_total(cls, label, amount, percentage):
+        return cls("group_total", label, amount, percentage, group_label=label)
+
+    @classmethod
+    def subtotal(cls, amount):
+        return cls("subtotal", "SUBTOTAL", amount, None)
+
+    @classmethod
+    def fee(cls, name, amount, percentage, fee_index):
+        return cls("fee", name, amount, percentage, fee_index=fee_index, editable=True)
+
+    @classmethod
+    def grand_total(cls, amount):
+        return cls("grand_total", "GRAND TOTAL", amount, None)
+
 class BudgetModel:
     def __init__(self, grand_total, admin_pct=5.0, contingency_pct=10.0, categories=None):
         self.grand_total = grand_total
@@ -62,10 +123,10 @@ class BudgetModel:
         self.prev_category_amounts = []
         # Default groups – used only if a manual budget is created.
         self.groups = [
-            ("TOTAL SCRIPT AND DEVELOPMENT", list(range(0, 4))),
-            ("TOTAL PRODUCTION COSTS", list(range(4, 14))),
-            ("TOTAL POST PRODUCTION", list(range(14, 18))),
-            ("TOTAL OTHER COSTS", list(range(18, 21)))
+            ("TOTAL SCRIPT AND DEVELOPMENT", tuple(range(0, 4))),
+            ("TOTAL PRODUCTION COSTS", tuple(range(4, 14))),
+            ("TOTAL POST PRODUCTION", tuple(range(14, 18))),
+            ("TOTAL OTHER COSTS", tuple(range(18, 21)))
         ]
         self.over_budget = False
         self.over_budget_rows = []
@@ -73,77 +134,117 @@ class BudgetModel:
         self.computed_grand_total = grand_total
         # New flag: if True, keep the imported category amounts (do not recalc them).
         self.keep_category_amounts = False
+        # Batch support: while suspended, recalc() only marks the model dirty.
+        self._suspend = 0
+        self._dirty = False
+        # get_table_data() output, rebuilt lazily after each recalc().
+        self._table_cache = None
+        self._group_mapping_cache = None
         self.recalc()
 
+    @contextmanager
+    def batch(self):
+        self._suspend += 1
+        try:
+            yield self
+        finally:
+            self._suspend -= 1
+        if not self._suspend and self._dirty:
+            self.recalc()
+
     def recalc(self):
+        self._table_cache = None
+        self._group_mapping_cache = None
+        if self._suspend:
+            self._dirty = True
+            return
+        self._dirty = False
+        # Local bindings keep attribute lookups out of the per-category loops.
+        cats = self.categories
+        fees = self.fees
         # Store previous amounts for change tracking
-        self.prev_category_amounts = [cat.amount for cat in self.categories]
+        self.prev_category_amounts = [cat.amount for cat in cats]
         # Calculate subtotal.
-        if not self.fees:
+        if not fees:
             self.subtotal = self.grand_total
         else:
             if self.import_mode == "amount":
-                self.subtotal = sum(cat.amount for cat in self.categories)
+                self.subtotal = sum(cat.amount for cat in cats)
             else:
-                fixed_fee_total = sum(fee.value for fee in self.fees if fee.fee_type == "fixed")
-                total_fee_pct = sum(fee.value for fee in self.fees if fee.fee_type == "percentage")
+                fixed_fee_total = sum(fee.value for fee in fees if fee.fee_type == "fixed")
+                total_fee_pct = sum(fee.value for fee in fees if fee.fee_type == "percentage")
                 if (1 + total_fee_pct/100) != 0:
                     self.subtotal = round((self.grand_total - fixed_fee_total) / (1 + total_fee_pct/100))
                 else:
                     self.subtotal = 0
         logger.debug("Recalc: grand_total=%s, subtotal=%s", self.grand_total, self.subtotal)
+        subtotal = self.subtotal
         # Recalculate categories.
-        if self.import_mode == "amount" and self.keep_category_amounts:
-            # Preserve the imported amounts; just update percentages.
-            if self.subtotal:
-                for cat in self.categories:
-                    cat.percentage = (cat.amount / self.subtotal * 100)
+        if self.import_mode == "amount":
+            # In amount mode the amounts are kept as they are; just update percentages.
+            if subtotal:
+                for cat in cats:
+                    cat.percentage = (cat.amount / subtotal * 100)
             else:
-                for cat in self.categories:
+                for cat in cats:
                     cat.percentage = 0
+            locked = [cat for cat in cats if cat.lock_type]
+            fixed_amt_total = sum(cat.amount for cat in locked)
+            fixed_percentage_total = sum(cat.percentage for cat in locked)
         else:
-            # Normal percentage-mode recalculation.
-            if self.import_mode == "amount":
-                # In amount mode, update percentages based on amounts.
-                for cat in self.categories:
-                    if self.subtotal:
-                        cat.percentage = (cat.amount / self.subtotal * 100)
-                    else:
-                        cat.percentage = 0
-            else:
-                fixed_percentage_total = 0.0
-                for cat in self.categories:
-                    if cat.lock_type == 1:  # Lock Amount
-                        fixed_amt = cat.amount_override if cat.amount_override is not None else cat.amount
-                        cat.amount = fixed_amt
-                        cat.percentage = (fixed_amt / self.subtotal * 100) if self.subtotal else 0
-                        fixed_percentage_total += cat.percentage
-                    elif cat.lock_type == 2:  # Lock Percentage
-                        cat.amount = round(self.subtotal * (cat.percentage / 100))
-                        fixed_percentage_total += cat.percentage
-                unlocked = [cat for cat in self.categories if cat.lock_type == 0]
-                unlocked_count = len(unlocked)
-                available_pct = 100 - fixed_percentage_total
-                if unlocked_count > 0:
-                    sum_desired = sum(cat.percentage for cat in unlocked)
-                    if sum_desired <= 0:
-                        for cat in unlocked:
-                            cat.percentage = available_pct / unlocked_count
-                            cat.amount = round(self.subtotal * (cat.percentage / 100))
-                    else:
-                        for cat in unlocked:
-                            new_pct = (cat.percentage / sum_desired) * available_pct
-                            cat.percentage = new_pct
-                            cat.amount = round(self.subtotal * (new_pct / 100))
+            # Single pass: settle locked categories and collect the unlocked ones.
+            fixed_amt_total = 0
+            fixed_percentage_total = 0.0
+            sum_desired = 0.0
+            unlocked = []
+            for cat in cats:
+                if cat.lock_type == 1:  # Lock Amount
+                    fixed_amt = cat.amount_override if cat.amount_override is not None else cat.amount
+                    cat.amount = fixed_amt
+                    cat.percentage = (fixed_amt / subtotal * 100) if subtotal else 0
+                    fixed_amt_total += cat.amount
+                    fixed_percentage_total += cat.percentage
+                elif cat.lock_type == 2:  # Lock Percentage
+                    cat.amount = round(subtotal * (cat.percentage / 100))
+                    fixed_amt_total += cat.amount
+                    fixed_percentage_total += cat.percentage
+                else:
+                    sum_desired += cat.percentage
+                    unlocked.append(cat)
+            unlocked_count = len(unlocked)
+            available_pct = 100 - fixed_percentage_total
+            if unlocked_count > 0:
+                if sum_desired <= 0:
+                    for cat in unlocked:
+                        cat.percentage = available_pct / unlocked_count
+                        cat.amount = round(subtotal * (cat.percentage / 100))
+                else:
+                    for cat in unlocked:
+                        new_pct = (cat.percentage / sum_desired) * available_pct
+                        cat.percentage = new_pct
+                        cat.amount = round(subtotal * (new_pct / 100))
+        # Totals of the locked categories, read by check_over_budget() and the controller.
+        self.fixed_amt_total = fixed_amt_total
+        self.fixed_pct_total = fixed_percentage_total
+        # Group indices clamped to the current categories, shared with get_table_data().
+        cat_count = len(cats)
+        self._valid_group_indices = [
+            (label, tuple(i for i in indices if i < cat_count))
+            for label, indices in self.groups
+        ]
+        self.group_totals = {
+            label: sum(cats[i].amount for i in indices)
+            for label, indices in self._valid_group_indices
+        }
         # Recalculate fee amounts.
-        for fee in self.fees:
+        for fee in fees:
             if fee.fee_type == "percentage":
-                fee.computed_amount = round(self.subtotal * (fee.value / 100))
+                fee.computed_amount = round(subtotal * (fee.value / 100))
             else:
                 fee.computed_amount = fee.value
-        if self.fees:
-            total_fee = sum(fee.computed_amount for fee in self.fees)
-            self.computed_grand_total = self.subtotal + total_fee
+        if fees:
+            total_fee = sum(fee.computed_amount for fee in fees)
+            self.computed_grand_total = subtotal + total_fee
         # --- Rounding correction: force grand_total to match user input ---
         # After computing fees and computed_grand_total, adjust contingency to absorb rounding residual
         diff = self.grand_total - self.computed_grand_total
@@ -185,17 +286,21 @@ class BudgetModel:
                 self.computed_grand_total = self.grand_total
 
     def check_over_budget(self):
+        # lock_type is 0 (unlocked), 1 or 2, so a truthy value means locked.
         tolerance = 1
-        fixed_total = sum(cat.amount for cat in self.categories if cat.lock_type in [1, 2])
-        if fixed_total > self.subtotal + tolerance:
+        if self.fixed_amt_total > self.subtotal + tolerance:
             self.over_budget = True
-            self.over_budget_rows = [i for i, cat in enumerate(self.categories) if cat.lock_type in [1, 2]]
+            self.over_budget_rows = [i for i, cat in enumerate(self.categories) if cat.lock_type]
         else:
             self.over_budget = False
             self.over_budget_rows = []
 
     def update_category_percentage(self, index, new_percentage):
         new_percentage = max(new_percentage, 0)
+        cat = self.categories[index]
+        # Re-entering the current value on an already locked category is a no-op.
+        if cat.lock_type == 2 and cat.percentage == new_percentage and not self.keep_category_amounts:
+            return
         self.categories[index].percentage = new_percentage
         # AUTOLOCK: Always lock by percentage when editing percentage
         self.categories[index].lock_type = 2
@@ -211,6 +316,9 @@ class BudgetModel:
 
     def update_category_amount(self, index, new_amount):
         new_amount = max(new_amount, 0)
+        cat = self.categories[index]
+        if cat.lock_type == 1 and cat.amount_override == new_amount and not self.keep_category_amounts:
+            return
         # AUTOLOCK: Always lock by amount when editing amount
         self.categories[index].lock_type = 1
         # AUTOLOCK: If category was unlocked, lock by amount when editing amount
@@ -227,6 +335,10 @@ class BudgetModel:
         self.recalc()
 
     def update_lock_type(self, index, lock_type):
+        cat = self.categories[index]
+        if (cat.lock_type == lock_type and (lock_type != 0 or cat.amount_override is None)
+                and not self.keep_category_amounts):
+            return
         self.categories[index].lock_type = lock_type
         if lock_type == 0:
             self.categories[index].amount_override = None
@@ -246,89 +358,54 @@ class BudgetModel:
         self.recalc()
 
     def set_grand_total(self, new_total):
-        self.grand_total = max(new_total, 0)
+        new_total = max(new_total, 0)
+        if new_total == self.grand_total:
+            return
+        self.grand_total = new_total
         self.recalc()
 
     def set_admin_pct(self, new_pct):
-        self.admin_pct = max(new_pct, 0)
+        new_pct = max(new_pct, 0)
+        if new_pct == self.admin_pct:
+            return
+        self.admin_pct = new_pct
         self.recalc()
 
     def set_contingency_pct(self, new_pct):
-        self.contingency_pct = max(new_pct, 0)
+        new_pct = max(new_pct, 0)
+        if new_pct == self.contingency_pct:
+            return
+        self.contingency_pct = new_pct
         self.recalc()
 
-    def get_group_total(self, indices):
-        return sum(self.categories[i].amount for i in indices)
-
-    def get_group_percentage(self, indices):
-        group_amt = self.get_group_total(indices)
-        return (group_amt / self.subtotal * 100) if self.subtotal else 0
-
     def get_table_data(self):
+        if self._table_cache is not None:
+            return self._table_cache, self._group_mapping_cache
         data = []
         group_mapping = {}
-        for group in self.groups:
-            label, indices = group
+        for label, indices in self._valid_group_indices:
             member_rows = []
             for idx in indices:
-                if idx < len(self.categories):
-                    cat = self.categories[idx]
-                    prev_amt = 0
-                    if idx < len(self.prev_category_amounts):
-                        prev_amt = self.prev_category_amounts[idx]
-                    change = cat.amount - prev_amt
-                    row = {
-                        "row_type": "category",
-                        "description": cat.name,
-                        "amount": cat.amount,
-                        "percentage": cat.percentage,
-                        "lock_type": cat.lock_type,
-                        "cat_index": idx,
-                        "change": change
-                    }
-                    member_rows.append(len(data))
-                    data.append(row)
-            total_row = {
-                "row_type": "group_total",
-                "description": label,
-                "amount": self.get_group_total(indices),
-                "percentage": self.get_group_percentage(indices),
-                "group_label": label
-            }
+                cat = self.categories[idx]
+                prev_amt = 0
+                if idx < len(self.prev_category_amounts):
+                    prev_amt = self.prev_category_amounts[idx]
+                member_rows.append(len(data))
+                data.append(Row.category(cat, idx, cat.amount - prev_amt))
             group_mapping[label] = {"member_rows": member_rows, "total_row": len(data)}
-            data.append(total_row)
-        data.append({
-            "row_type": "subtotal",
-            "description": "SUBTOTAL",
-            "amount": self.subtotal,
-            "percentage": None
-        })
+            group_amt = self.group_totals[label]
+            group_pct = (group_amt / self.subtotal * 100) if self.subtotal else 0
+            data.append(Row.group_total(label, group_amt, group_pct))
+        data.append(Row.subtotal(self.subtotal))
         for i, fee in enumerate(self.fees):
             if fee.fee_type == "percentage":
-                row = {
-                    "row_type": "fee",
-                    "description": fee.name,
-                    "amount": fee.computed_amount,
-                    "percentage": fee.value,
-                    "fee_index": i
-                }
+                data.append(Row.fee(fee.name, fee.computed_amount, fee.value, i))
             else:
                 fee_pct = (fee.value / self.subtotal * 100) if self.subtotal > 0 else 0
-                row = {
-                    "row_type": "fee",
-                    "description": fee.name,
-                    "amount": fee.value,
-                    "percentage": fee_pct,
-                    "fee_index": i
-                }
-            row["editable"] = True
-            data.append(row)
-        data.append({
-            "row_type": "grand_total",
-            "description": "GRAND TOTAL",
-            "amount": self.computed_grand_total,
-            "percentage": None
-        })
+                data.append(Row.fee(fee.name, fee.value, fee_pct, i))
+        data.append(Row.grand_total(self.computed_grand_total))
+        self._table_cache = data
+        self._group_mapping_cache = group_mapping
         return data, group_mapping
 
     def to_dict(self):
@@ -357,62 +434,63 @@ class BudgetModel:
         self.recalc()
 
     def save_to_file(self, filename):
-        with open(filename, "w") as f:
-            json.dump(self.to_dict(), f, indent=4)
+        if orjson is not None:
+            with open(filename, "wb", buffering=65536) as f:
+                f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+        else:
+            with open(filename, "w", buffering=65536) as f:
+                json.dump(self.to_dict(), f, indent=4)
 
     def load_from_file(self, filename):
-        with open(filename, "r") as f:
-            data = json.load(f)
+        with open(filename, "rb", buffering=65536) as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         self.from_dict(data)
 
     def import_from_excel(self, filename):
-        wb = load_workbook(filename=filename, data_only=True)
+        # Read-only mode streams rows instead of loading the whole styled workbook.
+        wb = load_workbook(filename=filename, data_only=True, read_only=True)
         ws = wb.active
         groups_dict = {}
         categories_list = []
         group_order = []
         self.fees = []  # clear current fees
         mode_detected = None  # "amount" or "percentage"
-        # Assume first row is header.
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if not row[0]:
-                continue
-            group = str(row[0]).strip()
-            cat_desc = str(row[1]).strip() if row[1] is not None else ""
-            amt_cell = str(row[2]).strip() if row[2] is not None else ""
-            pct_cell = str(row[3]).strip() if row[3] is not None else ""
-            try:
-                amount = float(amt_cell.replace(" ", "").replace(",", "."))
-            except Exception:
-                amount = 0.0
-            try:
-                percentage = float(pct_cell.replace(" ", "").replace(",", "."))
-            except Exception:
-                percentage = 0.0
-            if group.upper().startswith("FEES"):
-                fee_type = "percentage" if amount == 0 else "fixed"
-                if fee_type == "percentage" and percentage < 1:
-                    percentage *= 100
-                self.fees.append(FeeItem(cat_desc, fee_type, percentage if fee_type=="percentage" else amount))
-            else:
-                if mode_detected is None:
-                    mode_detected = "amount" if amount > 0 else "percentage"
+        try:
+            # Assume first row is header.
+            for row in ws.iter_rows(min_row=2, max_col=4, values_only=True):
+                if not row[0]:
+                    continue
+                group = str(row[0]).strip()
+                cat_desc = str(row[1]).strip() if row[1] is not None else ""
+                amount = _to_number(row[2])
+                percentage = _to_number(row[3])
+                if group.upper().startswith("FEES"):
+                    fee_type = "percentage" if amount == 0 else "fixed"
+                    if fee_type == "percentage" and percentage < 1:
+                        percentage *= 100
+                    self.fees.append(FeeItem(cat_desc, fee_type, percentage if fee_type=="percentage" else amount))
                 else:
-                    current_mode = "amount" if amount > 0 else "percentage"
-                    if current_mode != mode_detected:
-                        raise ValueError("Mixed mode detected in Excel import. Please use either amounts or percentages exclusively.")
-                cat = Category(cat_desc, percentage)
-                cat.amount = amount
-                cat_index = len(categories_list)
-                categories_list.append(cat)
-                if group not in groups_dict:
-                    groups_dict[group] = []
-                    group_order.append(group)
-                groups_dict[group].append(cat_index)
+                    if mode_detected is None:
+                        mode_detected = "amount" if amount > 0 else "percentage"
+                    else:
+                        current_mode = "amount" if amount > 0 else "percentage"
+                        if current_mode != mode_detected:
+                            raise ValueError("Mixed mode detected in Excel import. Please use either amounts or percentages exclusively.")
+                    cat = Category(cat_desc, percentage)
+                    cat.amount = amount
+                    cat_index = len(categories_list)
+                    categories_list.append(cat)
+                    if group not in groups_dict:
+                        groups_dict[group] = []
+                        group_order.append(group)
+                    groups_dict[group].append(cat_index)
+        finally:
+            wb.close()
         self.categories = categories_list
         self.groups = []
         for group in group_order:
-            self.groups.append((group, groups_dict[group]))
+            self.groups.append((group, tuple(groups_dict[group])))
         # Conversion: if mode_detected is "amount", then preserve category amounts.
         if mode_detected == "amount":
             cat_total = sum(cat.amount for cat in self.categories)
@@ -0,0 +1,42 @@
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QStyledItemDelegate, QComboBox, QStyle, QStyleOptionComboBox, QApplication
+from view.table_model import LOCK_LABELS
+
+class LockDelegate(QStyledItemDelegate):
+    # Lock cells are painted to look like combo boxes; a real QComboBox only exists while a cell is being edited.
+
+    def paint(self, painter, option, index):
+        lock_type = index.data(Qt.UserRole)
+        if lock_type is None:
+            super().paint(painter, option, index)
+            return
+        # Draw a combo box look-alike so the column reads the same as before, without a widget per row.
+        combo_option = QStyleOptionComboBox()
+        combo_option.rect = option.rect
+        combo_option.state = option.state
+        combo_option.currentText = LOCK_LABELS[lock_type]
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawComplexControl(QStyle.CC_ComboBox, combo_option, painter, option.widget)
+        style.drawControl(QStyle.CE_ComboBoxLabel, combo_option, painter, option.widget)
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        combo.addItems(LOCK_LABELS)
+        combo.activated.connect(lambda _: self._commit_and_close(combo))
+        # Open the list straight away so a single click behaves like the old per-row combo.
+        QTimer.singleShot(0, combo.showPopup)
+        return combo
+
+    def setEditorData(self, editor, index):
+        lock_type = index.data(Qt.UserRole)
+        editor.setCurrentIndex(lock_type if lock_type is not None else 0)
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentIndex(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
+
+    def _commit_and_close(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
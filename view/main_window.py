@@ -1,15 +1,14 @@
+import logging
 from PySide6.QtWidgets import (
-    QMainWindow, QTableWidget, QTableWidgetItem, QComboBox, QWidget,
-    QVBoxLayout, QHBoxLayout, QLabel, QMessageBox, QPushButton, QFileDialog
+    QMainWindow, QTableView, QWidget,
+    QVBoxLayout, QHBoxLayout, QLabel, QMessageBox, QPushButton, QFileDialog, QHeaderView
 )
-from PySide6.QtCore import Qt, Signal, Slot
-from PySide6.QtGui import QColor, QBrush, QFont, QGuiApplication
+from PySide6.QtCore import Qt, Signal, Slot, QModelIndex, QTimer
+from PySide6.QtGui import QGuiApplication
+from view.table_model import BudgetTableModel, format_amount, format_percentage
+from view.delegates import LockDelegate
 
-def format_amount(val):
-    return "{:,.0f}".format(val).replace(",", " ")
-
-def format_percentage(val):
-    return "{:.2f}".format(val).replace(".", ",")
+logger = logging.getLogger(__name__)
 
 class MainWindow(QMainWindow):
     catPercentageChanged = Signal(int, float)   # cat_index, new percentage
@@ -34,6 +33,15 @@ class MainWindow(QMainWindow):
         self.resize(1100, 600)
         self.setup_ui()
         self.groupClickedCallback = None
+        self._last_summary = None       # last set_locked_remaining arguments
+        self._remaining_negative = None  # whether the remaining label is styled red
+        # Cell edits are held briefly so a burst (typing through cells, pasting)
+        # reaches the controller as one edit per cell.
+        self._pending_edits = {}  # (row_type, index, column) -> (emit, args)
+        self._edit_timer = QTimer(self)
+        self._edit_timer.setSingleShot(True)
+        self._edit_timer.setInterval(40)
+        self._edit_timer.timeout.connect(self.flush_pending_edits)
 
     def setup_ui(self):
         central = QWidget()
@@ -68,10 +76,14 @@ class MainWindow(QMainWindow):
         top_bar.addWidget(self.lock_all_percentages_button)
         main_layout.addLayout(top_bar)
 
-        # Table with 4 columns: Description, Amount, Percentage, Lock.
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Description", "Amount", "Percentage", "Change", "Lock"])
+        # Table with 5 columns: Description, Amount, Percentage, Change, Lock.
+        self.table_model = BudgetTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.lock_delegate = LockDelegate(self.table)
+        self.table.setItemDelegateForColumn(4, self.lock_delegate)
+        # Every row has the same height, so the header never has to measure rows.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.setColumnWidth(0, 300)
         self.table.setColumnWidth(1, 150)
@@ -79,170 +91,108 @@ class MainWindow(QMainWindow):
         self.table.setColumnWidth(3, 150)
         self.table.setColumnWidth(4, 120)
         main_layout.addWidget(self.table)
-        self.table.cellChanged.connect(self.on_cell_changed)
-        self.table.cellClicked.connect(self.on_cell_clicked)
+        self.table_model.valueEdited.connect(self.on_cell_changed)
+        self.table.clicked.connect(self.on_cell_clicked)
 
     def set_locked_remaining(self, locked_amt, locked_pct, remaining_amt, remaining_pct):
+        summary = (locked_amt, locked_pct, remaining_amt, remaining_pct)
+        if summary == self._last_summary:
+            return
+        self._last_summary = summary
         self.locked_label.setText(f"Locked: {format_amount(locked_amt)} ({format_percentage(locked_pct)}%)")
         self.remaining_label.setText(f"Unlocked: {format_amount(remaining_amt)} ({format_percentage(remaining_pct)}%)")
-        if remaining_amt < 0:
-            self.remaining_label.setStyleSheet("color: red")
-            self.remaining_label.setToolTip(f"Over budget by {format_amount(abs(remaining_amt))}")
-        else:
-            self.remaining_label.setStyleSheet("")
-            self.remaining_label.setToolTip("")
+        negative = remaining_amt < 0
+        # Re-applying a style sheet re-polishes the label, so only do it when the sign flips.
+        if negative != self._remaining_negative:
+            self._remaining_negative = negative
+            self.remaining_label.setStyleSheet("color: red" if negative else "")
+        self.remaining_label.setToolTip(f"Over budget by {format_amount(abs(remaining_amt))}" if negative else "")
 
     def show_over_budget_error(self):
         QMessageBox.critical(self, "Over Budget", "The fixed allocations exceed the available budget.")
 
     def update_table(self, table_data, over_budget=False, over_budget_rows=None):
-        if over_budget_rows is None:
-            over_budget_rows = []
-        self.table.blockSignals(True)
-        self.table.setRowCount(len(table_data))
-        category_counter = 0
-        for row, data in enumerate(table_data):
-            row_type = data.get("row_type")
-            item_desc = QTableWidgetItem(data.get("description", ""))
-            item_desc.setFlags(Qt.ItemIsEnabled)
-            item_desc.setData(Qt.UserRole, row_type)
-            if row_type == "group_total":
-                font = QFont()
-                font.setBold(True)
-                item_desc.setFont(font)
-                item_desc.setData(Qt.UserRole + 2, data.get("group_label"))
-            self.table.setItem(row, 0, item_desc)
-            amt = data.get("amount", 0)
-            txt_amt = format_amount(amt)
-            if row_type in ["category", "fee", "grand_total"]:
-                item_amt = QTableWidgetItem(txt_amt)
-                item_amt.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable)
-                if row_type == "category":
-                    item_amt.setData(Qt.UserRole + 1, data.get("cat_index"))
-            else:
-                item_amt = QTableWidgetItem(txt_amt)
-                item_amt.setFlags(Qt.ItemIsEnabled)
-            self.table.setItem(row, 1, item_amt)
-            pct = data.get("percentage", 0)
-            txt_pct = format_percentage(pct) if pct is not None else ""
-            # Show 100% on SUBTOTAL row
-            if row_type == "subtotal":
-                txt_pct = "100,00"
-            if row_type in ["category", "fee"]:
-                item_pct = QTableWidgetItem(txt_pct)
-                item_pct.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable)
-                if row_type == "category":
-                    item_pct.setData(Qt.UserRole + 1, data.get("cat_index"))
-                elif row_type == "fee" and "fee_index" in data:
-                    item_pct.setData(Qt.UserRole + 2, data["fee_index"])
-            else:
-                item_pct = QTableWidgetItem(txt_pct)
-                item_pct.setFlags(Qt.ItemIsEnabled)
-            self.table.setItem(row, 2, item_pct)
-            # Change column (amount delta)
-            change_val = data.get("change") if isinstance(data, dict) else None
-            if change_val is None or abs(change_val) < 0.5:
-                txt_change = ""
-            else:
-                sign = "+" if change_val > 0 else ""
-                txt_change = f"{sign}{format_amount(change_val)}"
-            item_change = QTableWidgetItem(txt_change)
-            item_change.setFlags(Qt.ItemIsEnabled)
-            self.table.setItem(row, 3, item_change)
-            if row_type == "category":
-                combo = QComboBox()
-                combo.addItems(["Unlocked", "Lock Amount", "Lock Percentage"])
-                lock_type = data.get("lock_type", 0)
-                combo.setCurrentIndex(lock_type)
-                combo.setProperty("cat_index", data.get("cat_index"))
-                combo.currentIndexChanged.connect(self.on_lock_combobox_changed)
-                self.table.setCellWidget(row, 4, combo)
-            else:
-                blank = QTableWidgetItem("")
-                blank.setFlags(Qt.ItemIsEnabled)
-                self.table.setItem(row, 4, blank)
-            if row_type == "category":
-                if category_counter % 2 == 0:
-                    for col in range(self.table.columnCount()):
-                        cell = self.table.item(row, col)
-                        if cell:
-                            cell.setBackground(QBrush(QColor("#fafafa")))
-                category_counter += 1
-            if row_type == "category" and data.get("cat_index") in over_budget_rows and over_budget:
-                for col in range(self.table.columnCount()):
-                    cell = self.table.item(row, col)
-                    if cell:
-                        cell.setBackground(QBrush(QColor("red")))
-        self.table.blockSignals(False)
+        self.table_model.set_rows(table_data, over_budget=over_budget, over_budget_rows=over_budget_rows)
 
-    @Slot(int, int)
-    def on_cell_changed(self, row, column):
-        row_type = self.table.item(row, 0).data(Qt.UserRole)
-        item = self.table.item(row, column)
-        if not item:
+    def set_rows_hidden(self, row_states):
+        # Hide/show rows with painting suspended so the table relayouts once.
+        # Re-enabling updates repaints the whole viewport, so skip it when nothing changes.
+        changes = [(row, hidden) for row, hidden in row_states if self.table.isRowHidden(row) != hidden]
+        if not changes:
             return
-        text = item.text().replace(" ", "").replace(",", ".")
+        self.table.setUpdatesEnabled(False)
+        self.table.viewport().setUpdatesEnabled(False)
         try:
-            new_val = float(text)
-        except ValueError:
+            for row, hidden in changes:
+                self.table.setRowHidden(row, hidden)
+        finally:
+            self.table.viewport().setUpdatesEnabled(True)
+            self.table.setUpdatesEnabled(True)
+
+    @Slot(int, int, float)
+    def on_cell_changed(self, row, column, new_val):
+        data = self.table_model.row_data(row)
+        if not data:
             return
+        row_type = data.row_type
         if row_type == "category":
+            key = (row_type, data.cat_index, column)
             if column == 1:
-                cat_index = self.table.item(row, 1).data(Qt.UserRole + 1)
-                self.catAmountChanged.emit(cat_index, new_val)
+                self._queue_edit(key, self.catAmountChanged.emit, data.cat_index, new_val)
             elif column == 2:
-                cat_index = self.table.item(row, 2).data(Qt.UserRole + 1)
-                self.catPercentageChanged.emit(cat_index, new_val)
+                self._queue_edit(key, self.catPercentageChanged.emit, data.cat_index, new_val)
+            elif column == 4:
+                self._queue_edit(key, self.on_lock_type_edited, data.cat_index, int(new_val))
         elif row_type == "fee":
-            fee_index = self.table.item(row, 2).data(Qt.UserRole + 2)
+            fee_index = data.fee_index
+            key = (row_type, fee_index, column)
             # Assume if column 1 (Amount) is edited, then it's a fixed fee;
             # if column 2 (Percentage) is edited, then percentage fee.
             if column == 1:
-                self.feeAmountChanged.emit(fee_index, new_val)
+                self._queue_edit(key, self.feeAmountChanged.emit, fee_index, new_val)
             elif column == 2:
-                self.feePercentageChanged.emit(fee_index, new_val)
+                self._queue_edit(key, self.feePercentageChanged.emit, fee_index, new_val)
         elif row_type == "grand_total" and column == 1:
-            self.grandTotalChanged.emit(new_val)
+            self._queue_edit((row_type, None, column), self.grandTotalChanged.emit, new_val)
 
-    @Slot(int)
-    def on_lock_combobox_changed(self, index):
-        sender = self.sender()
-        if sender:
-            cat_index = sender.property("cat_index")
-            new_lock_type = index  # 0 = Unlocked, 1 = Lock Amount, 2 = Lock Percentage
-            print(f"[View] ComboBox changed: cat_index={cat_index}, new_lock_type={new_lock_type}")
-            self.lockTypeChanged.emit(int(cat_index), new_lock_type)
+    def _queue_edit(self, key, emit, *args):
+        # A newer edit of the same cell replaces the pending one and moves to the back,
+        # so edits still reach the controller in the order they were last made.
+        self._pending_edits.pop(key, None)
+        self._pending_edits[key] = (emit, args)
+        self._edit_timer.start()
 
-    @Slot(int, int)
-    def on_cell_clicked(self, row, column):
-        item = self.table.item(row, 0)
-        if not item:
+    @Slot()
+    def flush_pending_edits(self):
+        self._edit_timer.stop()
+        pending, self._pending_edits = self._pending_edits, {}
+        for emit, args in pending.values():
+            emit(*args)
+
+    def on_lock_type_edited(self, cat_index, new_lock_type):
+        # new_lock_type: 0 = Unlocked, 1 = Lock Amount, 2 = Lock Percentage
+        logger.debug("on_lock_type_edited: cat_index=%s, new_lock_type=%s", cat_index, new_lock_type)
+        self.lockTypeChanged.emit(int(cat_index), new_lock_type)
+
+    @Slot(QModelIndex)
+    def on_cell_clicked(self, index):
+        data = self.table_model.row_data(index.row())
+        if not data:
+            return
+        # One click on a lock cell opens the combo editor.
+        if index.column() == 4 and self.table_model.flags(index) & Qt.ItemIsEditable:
+            self.table.edit(index)
             return
-        row_type = item.data(Qt.UserRole)
-        if row_type == "group_total":
-            group_label = item.data(Qt.UserRole + 2)
+        if data.row_type == "group_total":
+            group_label = data.group_label
             if not group_label:
                 return
             if hasattr(self, "groupClickedCallback") and self.groupClickedCallback:
-                self.groupClickedCallback(row)
+                self.groupClickedCallback(index.row())
 
     @Slot()
     def copy_data(self):
-        rows = []
-        row_count = self.table.rowCount()
-        col_count = self.table.columnCount()
-        for row in range(row_count):
-            cols = []
-            for col in range(col_count):
-                widget = self.table.cellWidget(row, col)
-                if widget and isinstance(widget, QComboBox):
-                    val = widget.currentText()
-                else:
-                    item = self.table.item(row, col)
-                    val = item.text() if item else ""
-                cols.append(val)
-            rows.append("\t".join(cols))
-        final_text = "\n".join(rows)
+        final_text = self.table_model.to_tsv()
         clipboard = QGuiApplication.clipboard()
         clipboard.setText(final_text)
-        QMessageBox.information(self, "Copied", "Data copied to clipboard!\nYou can now paste directly into Excel.")
\ No newline at end of file
+        QMessageBox.information(self, "Copied", "Data copied to clipboard!\nYou can now paste directly into Excel.")
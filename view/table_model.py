@@ -0,0 +1,228 @@
+from difflib import SequenceMatcher
+from functools import lru_cache
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QColor, QBrush, QFont
+
+COLUMN_HEADERS = ["Description", "Amount", "Percentage", "Change", "Lock"]
+LOCK_LABELS = ["Unlocked", "Lock Amount", "Lock Percentage"]
+# "1 234,5" -> "1234.5" in one pass
+_NUM_TRANS = str.maketrans({" ": None, ",": "."})
+
+# flags() is asked for every visible cell on each repaint.
+_F_EDIT = Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable
+_F_RO = Qt.ItemIsEnabled
+_EDITABLE_COLUMNS = {"category": (1, 2, 4), "fee": (1, 2), "grand_total": (1,)}
+
+# Shared across all cells; data() is called per visible cell on every repaint.
+_OVER_BRUSH = QBrush(QColor("red"))
+_ALT_BRUSH = QBrush(QColor("#fafafa"))
+_BOLD_FONT = QFont()
+_BOLD_FONT.setBold(True)
+
+# Formatting is memoized: repeated values (0, shared amounts, fee percentages)
+# are looked up instead of formatted again on every refresh.
+@lru_cache(maxsize=4096)
+def _format_amount(rounded):
+    return "{:,}".format(rounded).replace(",", " ")
+
+def format_amount(val):
+    # Amounts are keyed on the rounded integer, which is what gets displayed.
+    return _format_amount(round(val))
+
+@lru_cache(maxsize=4096)
+def format_percentage(val):
+    return "{:.2f}".format(val).replace(".", ",")
+
+@lru_cache(maxsize=4096)
+def _format_change(rounded, positive):
+    return ("+" if positive else "") + _format_amount(rounded)
+
+class BudgetTableModel(QAbstractTableModel):
+    # row, column, parsed value of an accepted edit
+    valueEdited = Signal(int, int, float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._display = []            # per row: tuple of display strings, one per column
+        self._highlight = []          # per row: None, "alt" or "over"
+        self._keys = []               # per row: structure key, see _structure()
+        self._collapsed = set()       # group labels shown with a "+ " prefix
+        self._source = None           # (table_data, over_budget, over_budget_rows) last applied
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMN_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMN_HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def row_data(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def display_text(self, row, column):
+        return self._display[row][column]
+
+    def to_tsv(self):
+        return "\n".join("\t".join(cells) for cells in self._display)
+
+    def _format_row(self, data):
+        row_type = data.row_type
+        description = data.description
+        if row_type == "group_total" and data.group_label in self._collapsed:
+            description = "+ " + description
+        # Show 100% on SUBTOTAL row
+        if row_type == "subtotal":
+            pct_text = "100,00"
+        else:
+            pct_text = format_percentage(data.percentage) if data.percentage is not None else ""
+        change_val = data.change
+        if change_val is None or abs(change_val) < 0.5:
+            change_text = ""
+        else:
+            change_text = _format_change(round(change_val), change_val > 0)
+        lock_text = LOCK_LABELS[data.lock_type] if row_type == "category" else ""
+        return (description, format_amount(data.amount), pct_text, change_text, lock_text)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.UserRole and column == 4:
+            data = self._rows[row]
+            return data.lock_type if data.row_type == "category" else None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.display_text(row, column)
+        if role == Qt.BackgroundRole:
+            highlight = self._highlight[row]
+            if highlight == "over":
+                return _OVER_BRUSH
+            if highlight == "alt":
+                return _ALT_BRUSH
+            return None
+        if role == Qt.FontRole:
+            if column == 0 and self._rows[row].row_type == "group_total":
+                return _BOLD_FONT
+            return None
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.column() in _EDITABLE_COLUMNS.get(self._rows[index.row()].row_type, ()):
+            return _F_EDIT
+        return _F_RO
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        # Leaving an editor without changing it must not count as an edit, or the
+        # rounded display value would be written back (and lock the category).
+        if column == 4:
+            if value == self._rows[row].lock_type:
+                return False
+        elif str(value) == self._display[row][column]:
+            return False
+        text = str(value).translate(_NUM_TRANS)
+        try:
+            new_val = float(text)
+        except ValueError:
+            return False
+        # The model is refreshed from BudgetModel by the controller, so the
+        # edited value is only forwarded here, never stored.
+        self.valueEdited.emit(row, column, new_val)
+        return True
+
+    def set_rows(self, table_data, over_budget=False, over_budget_rows=None):
+        # BudgetModel hands out the same cached list until it recalculates, so a
+        # refresh with nothing recalculated has nothing to format or diff.
+        source = (table_data, over_budget, tuple(over_budget_rows or ()))
+        if self._source is not None and source[0] is self._source[0] and source[1:] == self._source[1:]:
+            return
+        self._source = source
+        over_budget_rows = set(over_budget_rows or []) if over_budget else set()
+        rows = list(table_data)
+        highlight = []
+        category_counter = 0
+        for data in rows:
+            mark = None
+            if data.row_type == "category":
+                if data.cat_index in over_budget_rows:
+                    mark = "over"
+                elif category_counter % 2 == 0:
+                    mark = "alt"
+                category_counter += 1
+            highlight.append(mark)
+        display = [self._format_row(data) for data in rows]
+        keys = self._structure(rows)
+
+        if keys != self._keys and not self._move_rows(keys, rows, display, highlight):
+            self.beginResetModel()
+            self._rows, self._display, self._highlight, self._keys = rows, display, highlight, keys
+            self.endResetModel()
+            return
+        self._keys = keys
+
+        old_display, old_highlight = self._display, self._highlight
+        self._rows, self._display, self._highlight = rows, display, highlight
+        # Emit dataChanged only for the cells whose text or background changed,
+        # merging consecutive rows that changed over the same column span.
+        last_column = self.columnCount() - 1
+        run = None  # (first_row, last_row, first_col, last_col)
+        for row in range(len(rows)):
+            if highlight[row] != old_highlight[row]:
+                span = (0, last_column)
+            else:
+                changed = [c for c, (old, new) in enumerate(zip(old_display[row], display[row])) if old != new]
+                span = (changed[0], changed[-1]) if changed else None
+            if run and span == run[2:] and row == run[1] + 1:
+                run = (run[0], row) + span
+                continue
+            if run:
+                self.dataChanged.emit(self.index(run[0], run[2]), self.index(run[1], run[3]))
+            run = (row, row) + span if span else None
+        if run:
+            self.dataChanged.emit(self.index(run[0], run[2]), self.index(run[1], run[3]))
+
+    def _move_rows(self, keys, rows, display, highlight):
+        # Turn pure row insertions/removals into insertRows/removeRows so the
+        # surviving rows keep their view state; anything else needs a reset.
+        opcodes = SequenceMatcher(None, self._keys, keys, autojunk=False).get_opcodes()
+        if any(tag == "replace" for tag, _, _, _, _ in opcodes):
+            return False
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == "delete":
+                self.beginRemoveRows(QModelIndex(), j1, j1 + (i2 - i1) - 1)
+                del self._rows[j1:j1 + (i2 - i1)]
+                del self._display[j1:j1 + (i2 - i1)]
+                del self._highlight[j1:j1 + (i2 - i1)]
+                self.endRemoveRows()
+            elif tag == "insert":
+                self.beginInsertRows(QModelIndex(), j1, j2 - 1)
+                self._rows[j1:j1] = rows[j1:j2]
+                self._display[j1:j1] = display[j1:j2]
+                self._highlight[j1:j1] = highlight[j1:j2]
+                self.endInsertRows()
+        return True
+
+    def set_group_collapsed(self, group_label, collapsed):
+        if collapsed:
+            self._collapsed.add(group_label)
+        else:
+            self._collapsed.discard(group_label)
+        for row, data in enumerate(self._rows):
+            if data.row_type == "group_total" and data.group_label == group_label:
+                self._display[row] = self._format_row(data)
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    @staticmethod
+    def _structure(rows):
+        return [(data.row_type, data.description, data.group_label) for data in rows]